@@ -1,129 +1,347 @@
 # File: app.py
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request
+from flask_caching import Cache
+from flask_compress import Compress
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+import ijson
+import hashlib
+import re
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
-import plotly.utils
 import networkx as nx
+import numpy as np
 from collections import defaultdict
+from itertools import islice
+from bisect import bisect_left
+import heapq
+import os
 import time
+import asyncio
 import threading
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
+from cachetools import TTLCache
+import diskcache
 
 app = Flask(__name__)
 
+# gzip/brotli for the JSON payloads; graph responses shrink several times over.
+# Registered manually so conditional requests are answered after compression
+app.config['COMPRESS_REGISTER'] = False
+compress = Compress(app)
+
+# Whole-response cache for the explore endpoints: Redis when configured, in-process otherwise
+cache = Cache(app, config={
+    'CACHE_TYPE': 'RedisCache' if os.environ.get('REDIS_URL') else 'SimpleCache',
+    'CACHE_REDIS_URL': os.environ.get('REDIS_URL'),
+    'CACHE_DEFAULT_TIMEOUT': 30
+})
+
+# Upper bound on addresses accepted by /api/explore_batch
+MAX_BATCH_ADDRESSES = 25
+
+# Base58 (P2PKH/P2SH) and bech32 addresses for mainnet, testnet and regtest. Batch entries are
+# pasted into Esplora URLs, so anything with '/', '?' or '..' must be rejected up front
+ADDRESS_PATTERN = re.compile(r'[13mn2][1-9A-HJ-NP-Za-km-z]{25,34}'
+                             r'|(?:bc|tb|bcrt)1[02-9ac-hj-np-z]{8,87}'
+                             r'|(?:BC|TB|BCRT)1[02-9AC-HJ-NP-Z]{8,87}')
+
+# Amounts are kept in integer satoshis and only converted to BTC for display
+SATS_PER_BTC = 100000000
+
+# Fail fast on unreachable hosts so the retry adapter can try again; reads keep longer budgets
+CONNECT_TIMEOUT = 3.05
+
+# On-disk transaction cache shared by all workers and kept across restarts, per user by default
+TX_DISK_CACHE_DIR = os.environ.get('BITTRACKER_CACHE_DIR') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'bittracker')
+TX_DISK_CACHE_BYTES = 2 * 1024 ** 3
+
+# Esplora returns confirmed transactions in pages of this size
+ESPLORA_PAGE_SIZE = 25
+
+# Only pages larger than this on the wire are stream-parsed (batch-heavy addresses)
+STREAM_PARSE_MIN_BYTES = 1024 * 1024
+
+# Graphs below this many nodes use the O(n) shell layout instead of spring_layout
+SHELL_LAYOUT_MAX_NODES = 50
+
+# Upper bound on counterparty edges drawn per graph, largest amounts first
+MAX_EDGES = 50
+
+# Edge line widths are snapped to these buckets so edges can share a trace
+EDGE_WIDTHS = (4, 8, 12)
+
+# Edge label fragments, built once instead of per edge
+RISK_BARS = tuple('🔴' * i + '⚪' * (5 - i) for i in range(6))
+DIR_LABELS = {'incoming': '📈 RECEIVED', 'outgoing': '📉 SENT'}
+SIGN = {'incoming': '+ ', 'outgoing': '- '}
+
+# Marker (size, color) per node type; counterparties default to the output style
+NODE_STYLE = {
+    'main': (35, '#ff4757'),
+    'input': (25, '#2ecc71'),
+    'output': (25, '#e74c3c'),
+}
+
+@lru_cache(maxsize=256)
+def _layout(edges, n_nodes, center):
+    """Node positions memoized on graph topology (a sorted tuple of edges)
+
+    NetworkX is only used here, on a throwaway graph built from the edge tuple.
+    """
+    G = nx.DiGraph()
+    G.add_edges_from(edges)
+    
+    # Every edge touches the main address, so small graphs are a star: put the
+    # main address in the middle and counterparties on a ring, no force simulation
+    if n_nodes < SHELL_LAYOUT_MAX_NODES:
+        pos = nx.shell_layout(G, nlist=[[center], [n for n in G if n != center]])
+    else:
+        # Larger graphs: default k=1/sqrt(n) spacing, stopping early once displacement settles
+        pos = nx.spring_layout(G, iterations=30, threshold=1e-3, seed=42)
+    
+    # Plain floats up front, so the figure never carries numpy scalars into the encoder
+    return {node: (float(x), float(y)) for node, (x, y) in pos.items()}
+
+def open_disk_cache(path):
+    """Open the on-disk cache, refusing a directory another user could have planted entries in"""
+    # diskcache unpickles what it reads, so the directory must be ours and closed to others
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.stat(path)
+    if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o022):
+        raise PermissionError(f"Refusing disk cache at {path}: owned by another user or writable by others")
+    return diskcache.Cache(path, size_limit=TX_DISK_CACHE_BYTES)
+
 class EnhancedBitcoinExplorer:
     def __init__(self):
         self.base_url = "https://blockstream.info/api"
-        self.transaction_cache = {}
-        self.address_cache = {}
+        # Bounded, expiring caches so stale chain data ages out and memory stays flat
+        self.transaction_cache = TTLCache(maxsize=4096, ttl=60)
+        self.address_cache = TTLCache(maxsize=4096, ttl=60)
+        self._cache_lock = threading.RLock()
+        # Process-safe L2 behind transaction_cache, so restarts and new workers start warm
+        self.transaction_disk_cache = open_disk_cache(TX_DISK_CACHE_DIR)
+        # Last rendered graph per (address, time_filter), reused while its transactions are unchanged.
+        # Counterparty balances move with their own activity, so renders age out like address_cache
+        self.graph_cache = TTLCache(maxsize=1024, ttl=60)
         self.session = requests.Session()
-        self.session.headers.update({'User-Agent': 'BitcoinNetExplorer/1.0'})
+        self.session.headers.update({
+            'User-Agent': 'BitcoinNetExplorer/1.0',
+            'Connection': 'keep-alive'
+        })
+        
+        # Pooled keep-alive connections so back-to-back Esplora calls reuse TLS sessions
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=[429, 502, 503, 504],
+                              raise_on_status=False)
+        )
+        self.session.mount('https://', adapter)
+        
+        # Only throttle after a 429 or once the API reports our quota is running low
         self.rate_limit_delay = 0.1
+        self.rate_limit_low_water = 5
+        self._next_allowed_ts = 0.0
+        self._rate_limit_lock = threading.Lock()
         
-    def get_address_info(self, address):
-        """Get comprehensive address information with caching"""
-        if address in self.address_cache:
-            return self.address_cache[address]
+        # Shared worker pool for concurrent address lookups over the pooled session
+        self.pool = ThreadPoolExecutor(max_workers=16)
+    
+    def _throttle(self):
+        """Sleep only if a previous response asked us to back off"""
+        with self._rate_limit_lock:
+            wait = self._next_allowed_ts - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+    
+    def _record_rate_limit(self, response):
+        """Push back the next allowed request time on 429s or a low remaining quota"""
+        if response.status_code == 429:
+            retry_after = response.headers.get('Retry-After', '1')
+            delay = int(retry_after) if retry_after.isdigit() else 1
+        else:
+            remaining = response.headers.get('X-RateLimit-Remaining')
+            if remaining is None or not remaining.isdigit():
+                return
+            if int(remaining) > self.rate_limit_low_water:
+                return
+            delay = self.rate_limit_delay
+        
+        with self._rate_limit_lock:
+            self._next_allowed_ts = max(self._next_allowed_ts, time.monotonic() + delay)
+    
+    def _get(self, url, timeout, stream=False):
+        """Rate-limit aware GET over the pooled session (timeout is the read timeout)"""
+        self._throttle()
+        response = self.session.get(url, timeout=(CONNECT_TIMEOUT, timeout), stream=stream)
+        self._record_rate_limit(response)
+        return response
+        
+    def get_address_info(self, address, fresh=False):
+        """Get comprehensive address information with caching (`fresh` skips the cache read)"""
+        with self._cache_lock:
+            cached = None if fresh else self.address_cache.get(address)
+        if cached is not None:
+            return cached
             
         try:
             url = f"{self.base_url}/address/{address}"
-            time.sleep(self.rate_limit_delay)
-            response = self.session.get(url, timeout=10)
+            response = self._get(url, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                self.address_cache[address] = data
+                data = orjson.loads(response.content)
+                with self._cache_lock:
+                    self.address_cache[address] = data
                 return data
             return None
         except Exception as e:
             print(f"Error fetching address info: {e}")
             return None
     
-    def get_address_transactions(self, address, limit=10, last_seen_txid=None):
-        """Enhanced transaction fetching with pagination and caching"""
-        cache_key = f"{address}_{limit}_{last_seen_txid}"
-        if cache_key in self.transaction_cache:
-            return self.transaction_cache[cache_key]
+    def get_address_infos(self, addresses, fresh=False):
+        """Fetch address info for several addresses concurrently"""
+        futures = {self.pool.submit(self.get_address_info, addr, fresh): addr for addr in addresses}
+        
+        infos = {}
+        for future in as_completed(futures):
+            infos[futures[future]] = future.result()
+        return infos
+    
+    def get_address_transactions(self, address, limit=10, last_seen_txid=None, fresh=False):
+        """Enhanced transaction fetching with pagination and caching (`fresh` skips the cache reads)"""
+        cache_key = (address, limit, last_seen_txid)
+        with self._cache_lock:
+            cached = None if fresh else self.transaction_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Disk hits are served as-is: copying them into transaction_cache would restart their 60s
+        # lifetime, so a page fetched by another worker could outlive the expiry
+        cached = None if fresh else self._disk_cache_get(cache_key)
+        if cached is not None:
+            return cached
             
         try:
             url = f"{self.base_url}/address/{address}/txs"
             if last_seen_txid:
                 url += f"?after_txid={last_seen_txid}"
                 
-            time.sleep(self.rate_limit_delay)
-            response = self.session.get(url, timeout=15)
+            response = self._get(url, timeout=15, stream=limit < ESPLORA_PAGE_SIZE)
             
             if response.status_code == 200:
-                transactions = response.json()[:limit]
+                transactions = self.read_transactions(response, limit)
                 processed = self.process_transactions_enhanced(address, transactions)
-                self.transaction_cache[cache_key] = processed
+                with self._cache_lock:
+                    self.transaction_cache[cache_key] = processed
+                self._disk_cache_set(cache_key, processed)
                 return processed
             return None
         except Exception as e:
             print(f"Error fetching transactions: {e}")
             return None
     
+    def _disk_cache_get(self, key):
+        """Read the on-disk L2 cache; a busy or broken disk counts as a miss"""
+        try:
+            return self.transaction_disk_cache.get(key)
+        except Exception as e:
+            print(f"Error reading transaction disk cache: {e}")
+            return None
+    
+    def _disk_cache_set(self, key, value):
+        """Write the on-disk L2 cache; failures are logged and never fail the request"""
+        try:
+            self.transaction_disk_cache.set(key, value, expire=60)
+        except Exception as e:
+            print(f"Error writing transaction disk cache: {e}")
+    
+    def read_transactions(self, response, limit):
+        """Parse at most `limit` transactions from an Esplora page"""
+        # orjson parses a whole typical page faster than ijson can stream part of it
+        content_length = int(response.headers.get('Content-Length') or 0)
+        if limit >= ESPLORA_PAGE_SIZE or content_length < STREAM_PARSE_MIN_BYTES:
+            return orjson.loads(response.content)[:limit]
+        
+        # Stream the array and stop parsing once we have enough transactions
+        response.raw.decode_content = True
+        transactions = list(islice(ijson.items(response.raw, 'item', use_float=True), limit))
+        
+        # Discard the unparsed tail so the connection goes back to the pool
+        response.raw.drain_conn()
+        response.raw.release_conn()
+        return transactions
+    
+    async def get_address_info_async(self, address, fresh=False):
+        """Awaitable get_address_info, run on the shared worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, self.get_address_info, address, fresh)
+    
+    async def get_address_transactions_async(self, address, limit=10, last_seen_txid=None, fresh=False):
+        """Awaitable get_address_transactions, run on the shared worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.pool, partial(self.get_address_transactions, address, limit, last_seen_txid, fresh)
+        )
+    
     def process_transactions_enhanced(self, main_address, transactions):
         """Enhanced transaction processing with categorization"""
         processed_txs = []
         
-        for tx in transactions:
+        # Format every block time in one batch rather than per transaction
+        block_times = [tx.get('status', {}).get('block_time', 0) for tx in transactions]
+        time_labels = self.format_timestamps(block_times)
+        
+        for tx, block_time, time_label in zip(transactions, block_times, time_labels):
             tx_data = {
                 'txid': tx['txid'],
                 'block_height': tx.get('status', {}).get('block_height', 0),
                 'confirmations': self.get_confirmations(tx.get('status', {})),
-                'time': self.format_timestamp(tx.get('status', {}).get('block_time', 0)),
-                'raw_time': tx.get('status', {}).get('block_time', 0),
-                'fee': tx.get('fee', 0) / 100000000,
+                'time': time_label,
+                'raw_time': block_time,
+                'fee': tx.get('fee', 0),
                 'inputs': [],
                 'outputs': [],
                 'amount_change': 0,
+                'primary_source': None,
+                'primary_dest': None,
                 'category': 'unknown',
                 'risk_score': 0
             }
             
-            # Enhanced input/output processing
-            total_input_value = 0
-            total_output_value = 0
-            unique_input_addresses = set()
-            unique_output_addresses = set()
+            # Vectorized input/output processing: satoshi values as int64 arrays
+            prevouts = [vin['prevout'] for vin in tx.get('vin', []) if 'prevout' in vin]
+            vouts = tx.get('vout', [])
             
-            # Process inputs with enhanced data
-            for vin in tx.get('vin', []):
-                if 'prevout' in vin:
-                    addr = vin['prevout'].get('scriptpubkey_address', 'Unknown')
-                    value = vin['prevout'].get('value', 0) / 100000000
-                    
-                    tx_data['inputs'].append({
-                        'address': addr, 
-                        'value': value,
-                        'type': vin['prevout'].get('scriptpubkey_type', 'unknown')
-                    })
-                    
-                    unique_input_addresses.add(addr)
-                    total_input_value += value
-                    
-                    if addr == main_address:
-                        tx_data['amount_change'] -= value
+            in_addrs = np.array([p.get('scriptpubkey_address', 'Unknown') for p in prevouts], dtype=object)
+            in_sats = np.fromiter((p.get('value', 0) for p in prevouts), dtype=np.int64, count=len(prevouts))
+            out_addrs = np.array([v.get('scriptpubkey_address', 'Unknown') for v in vouts], dtype=object)
+            out_sats = np.fromiter((v.get('value', 0) for v in vouts), dtype=np.int64, count=len(vouts))
             
-            # Process outputs with enhanced data
-            for vout in tx.get('vout', []):
-                addr = vout.get('scriptpubkey_address', 'Unknown')
-                value = vout.get('value', 0) / 100000000
-                
-                tx_data['outputs'].append({
-                    'address': addr, 
-                    'value': value,
-                    'type': vout.get('scriptpubkey_type', 'unknown')
-                })
-                
-                unique_output_addresses.add(addr)
-                total_output_value += value
-                
-                if addr == main_address:
-                    tx_data['amount_change'] += value
+            tx_data['inputs'] = [
+                {'address': addr, 'value': value, 'type': prevout.get('scriptpubkey_type', 'unknown')}
+                for addr, value, prevout in zip(in_addrs.tolist(), in_sats.tolist(), prevouts)
+            ]
+            tx_data['outputs'] = [
+                {'address': addr, 'value': value, 'type': vout.get('scriptpubkey_type', 'unknown')}
+                for addr, value, vout in zip(out_addrs.tolist(), out_sats.tolist(), vouts)
+            ]
+            
+            unique_input_addresses = set(in_addrs.tolist())
+            unique_output_addresses = set(out_addrs.tolist())
+            total_input_value = int(in_sats.sum())
+            total_output_value = int(out_sats.sum())
+            
+            # Net effect on the main address, plus its largest counterparty on each side
+            in_is_main = in_addrs == main_address
+            out_is_main = out_addrs == main_address
+            tx_data['amount_change'] = int(out_sats[out_is_main].sum() - in_sats[in_is_main].sum())
+            tx_data['primary_source'] = self.find_primary_address(in_addrs, in_sats, in_is_main)
+            tx_data['primary_dest'] = self.find_primary_address(out_addrs, out_sats, out_is_main)
             
             # Enhanced transaction categorization
             tx_data['category'] = self.categorize_transaction(
@@ -144,7 +362,7 @@ class EnhancedBitcoinExplorer:
             return 'simple_payment'
         elif len(input_addrs) > 10 or len(output_addrs) > 10:
             return 'exchange_batch'
-        elif abs(input_val - output_val) < 0.00001:
+        elif abs(input_val - output_val) < 1000:
             return 'consolidation'
         elif len(output_addrs) > 50:
             return 'mixing_suspicious'
@@ -159,7 +377,7 @@ class EnhancedBitcoinExplorer:
             score += 3
         if len(tx_data['outputs']) > 20:
             score += 2
-        if tx_data['fee'] > 0.001:  # High fee
+        if tx_data['fee'] > 100000:  # High fee (0.001 BTC)
             score += 1
         if tx_data['confirmations'] == 0:  # Unconfirmed
             score += 1
@@ -173,130 +391,174 @@ class EnhancedBitcoinExplorer:
         # This is simplified - in real implementation you'd need current block height
         return max(0, 800000 - status.get('block_height', 800000))  # Estimated
     
-    def format_timestamp(self, timestamp):
-        """Enhanced timestamp formatting"""
-        if timestamp == 0:
-            return 'Unconfirmed'
-        
-        dt = datetime.fromtimestamp(timestamp)
-        now = datetime.now()
-        diff = now - dt
-        
-        if diff.days == 0:
-            return f"Today {dt.strftime('%H:%M')}"
-        elif diff.days == 1:
-            return f"Yesterday {dt.strftime('%H:%M')}"
-        elif diff.days < 7:
-            return f"{diff.days} days ago"
-        else:
-            return dt.strftime('%Y-%m-%d %H:%M')
+    def format_timestamps(self, timestamps):
+        """Enhanced timestamp formatting for a batch of block times"""
+        # Local wall-clock 'YYYY-MM-DDTHH:MM:SS' strings, formatted in one numpy call
+        stamps = np.array(timestamps, dtype='datetime64[s]')
+        local = [text[:19] for text in np.datetime_as_string(stamps, timezone='local').tolist()]
+        
+        # Whole days between local wall-clock times, as timedelta.days counts them
+        now = np.datetime64(datetime.now(), 's')
+        days = ((now - np.array(local, dtype='datetime64[s]')) // np.timedelta64(1, 'D')).tolist()
+        
+        labels = []
+        for timestamp, wall, day in zip(timestamps, local, days):
+            if timestamp == 0:
+                labels.append('Unconfirmed')
+            elif day == 0:
+                labels.append(f"Today {wall[11:16]}")
+            elif day == 1:
+                labels.append(f"Yesterday {wall[11:16]}")
+            elif day < 7:
+                labels.append(f"{day} days ago")
+            else:
+                labels.append(f"{wall[:10]} {wall[11:16]}")
+        return labels
     
-    def create_enhanced_transaction_graph(self, address, transactions, time_filter=None):
-        """Enhanced graph creation with filtering and improved layout"""
-        G = nx.DiGraph()
-        
-        # Filter transactions by time if specified
-        if time_filter:
-            filtered_txs = []
-            cutoff_time = time.time() - (time_filter * 24 * 3600)  # days to seconds
-            for tx in transactions:
-                if tx['raw_time'] > cutoff_time:
-                    filtered_txs.append(tx)
-            transactions = filtered_txs
+    def filter_transactions(self, transactions, time_filter=None):
+        """Keep transactions from the last `time_filter` days, or all of them"""
+        if not time_filter:
+            return transactions
+        cutoff_time = time.time() - time_filter * 86400  # days to seconds
+        return [tx for tx in transactions if tx['raw_time'] > cutoff_time]
+    
+    def collect_graph(self, address, transactions, time_filter=None, fresh=False):
+        """Aggregate transactions into graph nodes and edges, fetching node balances"""
+        # The graph is a small star around the main address, so plain containers suffice:
+        # nodes maps address -> attributes, edges is a list of (source, dest, attributes)
+        nodes = {}
         
-        # Add main address with enhanced info
-        address_info = self.get_address_info(address)
-        balance = address_info.get('chain_stats', {}).get('funded_txo_sum', 0) / 100000000 if address_info else 0
+        transactions = self.filter_transactions(transactions, time_filter)
         
-        G.add_node(address, 
-                  node_type='main', 
-                  label=f"Main: {address[:12]}...",
-                  balance=balance,
-                  tx_count=len(transactions))
+        # Add main address with enhanced info
+        nodes[address] = {'node_type': 'main',
+                          'label': f"Main: {address[:12]}...",
+                          'tx_count': len(transactions)}
         
-        edge_data = defaultdict(lambda: {'amount': 0, 'count': 0, 'txs': []})
+        # Running per-edge aggregates, so the edges never need a second pass over their txs
+        edge_data = defaultdict(lambda: {'amount': 0, 'count': 0, 'risk_level': 0,
+                                         'categories': {}, 'latest_time': -1, 'latest_tx': None})
         
         # Process transactions with aggregation
         for tx in transactions:
             net_change = tx['amount_change']
             
-            if abs(net_change) < 0.00000001:
+            if net_change == 0:
                 continue
                 
             if net_change > 0:  # Incoming
-                primary_source = self.find_primary_address(tx['inputs'], address, 'source')
-                if primary_source:
-                    key = (primary_source, address)
-                    edge_data[key]['amount'] += abs(net_change)
-                    edge_data[key]['count'] += 1
-                    edge_data[key]['txs'].append(tx)
-                    edge_data[key]['direction'] = 'incoming'
-                    
-                    G.add_node(primary_source, 
-                              node_type='input', 
-                              label=f"{primary_source[:12]}...")
+                primary_source = tx['primary_source']
+                if not primary_source:
+                    continue
+                key, direction = (primary_source, address), 'incoming'
+                
+                nodes[primary_source] = {'node_type': 'input',
+                                         'label': f"{primary_source[:12]}..."}
                              
             else:  # Outgoing
-                primary_dest = self.find_primary_address(tx['outputs'], address, 'destination')
-                if primary_dest:
-                    key = (address, primary_dest)
-                    edge_data[key]['amount'] += abs(net_change)
-                    edge_data[key]['count'] += 1
-                    edge_data[key]['txs'].append(tx)
-                    edge_data[key]['direction'] = 'outgoing'
-                    
-                    G.add_node(primary_dest, 
-                              node_type='output', 
-                              label=f"{primary_dest[:12]}...")
+                primary_dest = tx['primary_dest']
+                if not primary_dest:
+                    continue
+                key, direction = (address, primary_dest), 'outgoing'
+                
+                nodes[primary_dest] = {'node_type': 'output',
+                                       'label': f"{primary_dest[:12]}..."}
+            
+            data = edge_data[key]
+            data['amount'] += abs(net_change)
+            data['count'] += 1
+            data['direction'] = direction
+            data['risk_level'] = max(data['risk_level'], tx['risk_score'])
+            data['categories'][tx['category']] = None  # insertion-ordered set
+            if tx['raw_time'] > data['latest_time']:
+                data['latest_time'] = tx['raw_time']
+                data['latest_tx'] = tx['time']
+        
+        # Busy addresses keep only their largest counterparties, so the graph stays legible
+        # and its layout, balance lookups and payload stay bounded
+        if len(edge_data) > MAX_EDGES:
+            kept = heapq.nlargest(MAX_EDGES, edge_data, key=lambda key: edge_data[key]['amount'])
+            edge_data = {key: edge_data[key] for key in kept}
+            kept_nodes = {node for key in kept for node in key}
+            nodes = {node: attrs for node, attrs in nodes.items() if node in kept_nodes}
+        
+        # Look up balances for the main address and all counterparties in one fan-out
+        address_infos = self.get_address_infos(nodes, fresh)
+        for node, address_info in address_infos.items():
+            chain_stats = address_info.get('chain_stats', {}) if address_info else {}
+            # Confirmed balance: everything received minus everything spent
+            nodes[node]['balance'] = chain_stats.get('funded_txo_sum', 0) - chain_stats.get('spent_txo_sum', 0)
         
         # Add aggregated edges
-        for (source, dest), data in edge_data.items():
-            risk_level = max([tx['risk_score'] for tx in data['txs']])
-            categories = list(set([tx['category'] for tx in data['txs']]))
-            
-            G.add_edge(source, dest,
-                      weight=data['amount'],
-                      amount=data['amount'],
-                      count=data['count'],
-                      direction=data['direction'],
-                      risk_level=risk_level,
-                      categories=categories,
-                      latest_tx=max(data['txs'], key=lambda x: x['raw_time'])['time'])
-        
-        return self.create_plotly_graph_enhanced(G, address)
+        edges = [
+            (source, dest, {'amount': data['amount'],
+                            'count': data['count'],
+                            'direction': data['direction'],
+                            'risk_level': data['risk_level'],
+                            'categories': list(data['categories']),
+                            'latest_tx': data['latest_tx']})
+            for (source, dest), data in edge_data.items()
+        ]
+        
+        return nodes, edges
     
-    def find_primary_address(self, addr_list, main_address, direction):
-        """Find primary address excluding main address"""
-        candidates = [item for item in addr_list 
-                     if item['address'] != main_address and item['address'] != 'Unknown']
+    def build_graph(self, address, transactions, time_filter=None, fresh=False):
+        """Graph JSON and node addresses, reusing the last render while nothing has changed"""
+        transactions = self.filter_transactions(transactions, time_filter)
+        key = (address, time_filter)
+        # Everything per transaction that reaches the figure: a confirmation changes the time
+        # label and risk score without changing the txid
+        signature = frozenset((tx['txid'], tx['raw_time'], tx['time'], tx['risk_score'], tx['category'])
+                              for tx in transactions)
+        
+        with self._cache_lock:
+            previous = None if fresh else self.graph_cache.get(key)
+        if previous and previous['signature'] == signature:
+            return previous['graph_json'], previous['node_addresses']
         
-        if not candidates:
+        nodes, edges = self.collect_graph(address, transactions, fresh=fresh)
+        fig, node_addresses = self.create_plotly_graph_enhanced(nodes, edges, address)
+        graph_json = encode_figure(fig)
+        
+        with self._cache_lock:
+            self.graph_cache[key] = {'signature': signature,
+                                     'graph_json': graph_json, 'node_addresses': node_addresses}
+        return graph_json, node_addresses
+    
+    def find_primary_address(self, addrs, sats, is_main):
+        """Find the highest-value address excluding the main address"""
+        candidates = ~is_main & (addrs != 'Unknown')
+        
+        if not candidates.any():
             return None
-            
-        return max(candidates, key=lambda x: x['value'])['address']
+        
+        return addrs[np.argmax(np.where(candidates, sats, -1))]
     
-    def create_plotly_graph_enhanced(self, G, main_address):
+    def create_plotly_graph_enhanced(self, nodes, edges, main_address):
         """Create enhanced Plotly visualization"""
-        if len(G.nodes()) <= 1:
-            return go.Figure().add_annotation(
+        if len(nodes) <= 1:
+            return {'data': [], 'layout': {'annotations': [dict(
                 text="No meaningful transactions found",
                 xref="paper", yref="paper",
                 x=0.5, y=0.5, showarrow=False
-            ), []
+            )]}}, []
         
-        # Enhanced layout algorithm
-        pos = nx.spring_layout(G, k=3, iterations=150, seed=42)
+        # Enhanced layout algorithm, reused when the same topology is explored again
+        pos = _layout(tuple(sorted((source, dest) for source, dest, _ in edges)), len(nodes), main_address)
         
-        # Create enhanced edge traces
-        edge_traces = []
+        return self._build_raw_figure(nodes, edges, main_address, pos), list(nodes)
+    
+    def _build_raw_figure(self, nodes, edges, main_address, pos):
+        """Build the figure as a plain dict following Plotly's JSON schema"""
+        # Edges sharing a style are drawn as one trace, broken up by None separators
+        edge_groups = defaultdict(lambda: ([], [], []))
         edge_annotations = []
         
-        for edge in G.edges():
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
+        for source, dest, edge_data in edges:
+            x0, y0 = pos[source]
+            x1, y1 = pos[dest]
             
-            edge_data = G.edges[edge]
-            amount = edge_data['amount']
+            amount = edge_data['amount'] / SATS_PER_BTC
             count = edge_data['count']
             direction = edge_data['direction']
             risk_level = edge_data.get('risk_level', 0)
@@ -306,30 +568,25 @@ class EnhancedBitcoinExplorer:
             if risk_level > 2:
                 base_color = '#ff6348' if direction == 'incoming' else '#8b0000'
             
-            width = max(2, min(12, amount * 40 + count))
+            # A trace has a single line width, so snap to the nearest bucket at or above it
+            width = EDGE_WIDTHS[bisect_left(EDGE_WIDTHS, max(2, min(12, amount * 40 + count)))]
             opacity = 0.8 if risk_level <= 2 else 0.9
             
-            edge_trace = go.Scatter(
-                x=[x0, x1, None], y=[y0, y1, None],
-                line=dict(width=width, color=base_color),
-                opacity=opacity,
-                hoverinfo='text',
-                hovertext=f"{'📈 RECEIVED' if direction == 'incoming' else '📉 SENT'}: {amount:.8f} BTC<br>"
+            hovertext = (f"{DIR_LABELS[direction]}: {amount:.8f} BTC<br>"
                          f"Transactions: {count}<br>"
-                         f"Risk Level: {'🔴' * risk_level}{'⚪' * (5-risk_level)}<br>"
-                         f"Latest: {edge_data['latest_tx']}",
-                mode='lines',
-                showlegend=False
-            )
-            edge_traces.append(edge_trace)
+                         f"Risk Level: {RISK_BARS[risk_level]}<br>"
+                         f"Latest: {edge_data['latest_tx']}")
+            
+            group_x, group_y, group_hover = edge_groups[(base_color, opacity, width)]
+            group_x += [x0, x1, None]
+            group_y += [y0, y1, None]
+            group_hover += [hovertext, hovertext, None]
             
             # Enhanced amount annotations
             mid_x, mid_y = (x0 + x1) / 2, (y0 + y1) / 2
             
-            if count > 1:
-                amount_text = f"{'+ ' if direction == 'incoming' else '- '}{amount:.6f} BTC ({count}x)"
-            else:
-                amount_text = f"{'+ ' if direction == 'incoming' else '- '}{amount:.6f} BTC"
+            repeat = f" ({count}x)" if count > 1 else ""
+            amount_text = f"{SIGN[direction]}{amount:.6f} BTC{repeat}"
             
             edge_annotations.append(dict(
                 x=mid_x, y=mid_y, text=amount_text,
@@ -339,54 +596,62 @@ class EnhancedBitcoinExplorer:
                 borderwidth=1, borderpad=3, opacity=0.9
             ))
         
-        # Enhanced node traces
-        node_x, node_y, node_info, node_colors, node_sizes = [], [], [], [], []
+        edge_traces = [dict(
+            type='scatter',
+            x=group_x, y=group_y,
+            line=dict(width=width, color=color),
+            opacity=opacity,
+            hoverinfo='text', hovertext=group_hover,
+            mode='lines',
+            showlegend=False
+        ) for (color, opacity, width), (group_x, group_y, group_hover) in edge_groups.items()]
         
-        for node in G.nodes():
-            x, y = pos[node]
-            node_x.append(x)
-            node_y.append(y)
-            
-            node_data = G.nodes[node]
+        # Per-counterparty totals in a single pass over the edges
+        sent_to_main = defaultdict(int)
+        received_from_main = defaultdict(int)
+        for source, dest, data in edges:
+            if data['direction'] == 'incoming':
+                sent_to_main[source] += data['amount']
+            else:
+                received_from_main[dest] += data['amount']
+        
+        # Enhanced node traces, one row per node unzipped into columns
+        node_rows = []
+        
+        for node, node_data in nodes.items():
             node_type = node_data.get('node_type', 'unknown')
+            size, color = NODE_STYLE.get(node_type, NODE_STYLE['output'])
+            balance = node_data.get('balance', 0) / SATS_PER_BTC
             
             if node_type == 'main':
-                node_colors.append('#ff4757')
-                node_sizes.append(35)
-                balance = node_data.get('balance', 0)
-                tx_count = node_data.get('tx_count', 0)
-                node_info.append(f"🎯 YOUR ADDRESS<br>{node[:25]}...<br>"
-                               f"<b>Balance: {balance:.8f} BTC</b><br>"
-                               f"Transactions: {tx_count}")
+                info = (f"🎯 YOUR ADDRESS<br>{node[:25]}...<br>"
+                        f"<b>Balance: {balance:.8f} BTC</b><br>"
+                        f"Transactions: {node_data.get('tx_count', 0)}")
+            elif node_type == 'input':
+                info = (f"📈 SOURCE<br>{node[:25]}...<br>"
+                        f"<b>Sent you: +{sent_to_main[node] / SATS_PER_BTC:.8f} BTC</b><br>"
+                        f"Balance: {balance:.8f} BTC")
             else:
-                incoming = sum([G.edges[e]['amount'] for e in G.edges() 
-                              if e[1] == node and G.edges[e]['direction'] == 'incoming'])
-                outgoing = sum([G.edges[e]['amount'] for e in G.edges() 
-                              if e[0] == node and G.edges[e]['direction'] == 'outgoing'])
-                
-                if node_type == 'input':
-                    node_colors.append('#2ecc71')
-                    node_sizes.append(25)
-                    node_info.append(f"📈 SOURCE<br>{node[:25]}...<br>"
-                                   f"<b>Sent you: +{incoming:.8f} BTC</b>")
-                else:
-                    node_colors.append('#e74c3c')
-                    node_sizes.append(25)
-                    node_info.append(f"📉 DESTINATION<br>{node[:25]}...<br>"
-                                   f"<b>You sent: -{outgoing:.8f} BTC</b>")
-        
-        node_trace = go.Scatter(
+                info = (f"📉 DESTINATION<br>{node[:25]}...<br>"
+                        f"<b>You sent: -{received_from_main[node] / SATS_PER_BTC:.8f} BTC</b><br>"
+                        f"Balance: {balance:.8f} BTC")
+            
+            x, y = pos[node]
+            node_rows.append((x, y, info, color, size))
+        
+        node_x, node_y, node_info, node_colors, node_sizes = zip(*node_rows)
+        
+        node_trace = dict(
+            type='scatter',
             x=node_x, y=node_y, mode='markers',
-            hoverinfo='text', text=node_info,
+            hoverinfo='text', text=node_info, customdata=list(nodes),
             marker=dict(size=node_sizes, color=node_colors,
                        line=dict(width=3, color='white'), opacity=0.95),
             showlegend=False
         )
         
         # Create enhanced figure
-        fig = go.Figure(data=edge_traces + [node_trace])
-        
-        fig.update_layout(
+        layout = dict(
             title=dict(
                 text=f'🔗 Enhanced Bitcoin Network: {main_address[:30]}...',
                 font=dict(size=18, color='#2c3e50'), x=0.5
@@ -400,59 +665,135 @@ class EnhancedBitcoinExplorer:
             paper_bgcolor='white'
         )
         
-        return fig, list(G.nodes())
+        return {'data': edge_traces + [node_trace], 'layout': layout}
 
 # Initialize enhanced explorer
 explorer = EnhancedBitcoinExplorer()
 
+def encode_figure(fig):
+    """Serialize a raw Plotly figure dict with orjson"""
+    # Figures only hold plain Python values, so orjson encodes them in one pass
+    return orjson.dumps(fig, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+def json_response(payload, status=200):
+    """Encode an API payload with orjson, bypassing jsonify's stdlib encoder"""
+    return Response(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+                    status=status, mimetype='application/json')
+
+def nocache_requested():
+    """`?nocache=1` bypasses every cache read and stores a fresh copy"""
+    return request.args.get('nocache') == '1'
+
+def is_cacheable_response(rv):
+    """Only successful explore responses go into the response cache"""
+    return isinstance(rv, Response) and rv.status_code == 200
+
+def with_cache_validators(response):
+    """Tag an explore response with an ETag derived from its (uncompressed) body"""
+    # Confirmations, time labels and risk scores change while the txids stay the same,
+    # and no block time marks those changes, so only the body itself is a safe validator
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    
+    # Let browsers keep the body but revalidate it on every poll
+    response.cache_control.no_cache = True
+    return response
+
+@app.after_request
+def finalize_response(response):
+    """Compress the body, then reply 304 if the client's cached copy is still current"""
+    # Compression suffixes the ETag (":gzip"), which is what clients will send back
+    response = compress.after_request(response)
+    if response.get_etag()[0]:
+        return response.make_conditional(request)
+    return response
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/api/explore/<address>')
-def explore_address(address):
-    transactions = explorer.get_address_transactions(address, limit=15)
+@cache.cached(timeout=30, forced_update=nocache_requested, response_filter=is_cacheable_response)
+async def explore_address(address):
+    fresh = nocache_requested()
+    # Address info and transactions are independent, so fetch them together
+    address_info, transactions = await asyncio.gather(
+        explorer.get_address_info_async(address, fresh),
+        explorer.get_address_transactions_async(address, limit=15, fresh=fresh)
+    )
     if transactions:
-        fig, node_addresses = explorer.create_enhanced_transaction_graph(address, transactions)
-        graph_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        graph_json, node_addresses = explorer.build_graph(address, transactions, fresh=fresh)
         
-        return jsonify({
+        return with_cache_validators(json_response({
             'success': True,
             'graph': graph_json,
             'transactions': transactions,
             'node_addresses': node_addresses,
-            'address_info': explorer.get_address_info(address)
-        })
+            'address_info': address_info
+        }))
     else:
-        return jsonify({'success': False, 'error': 'Failed to fetch transactions'})
+        return json_response({'success': False, 'error': 'Failed to fetch transactions'}, 502)
 
 @app.route('/api/explore/<address>/<int:time_filter>')
-def explore_address_filtered(address, time_filter):
+@cache.cached(timeout=30, forced_update=nocache_requested, response_filter=is_cacheable_response)
+async def explore_address_filtered(address, time_filter):
     """Explore address with time filtering (days)"""
-    transactions = explorer.get_address_transactions(address, limit=20)
+    fresh = nocache_requested()
+    # Warm the address-info cache for the graph while the transactions load
+    _, transactions = await asyncio.gather(
+        explorer.get_address_info_async(address, fresh),
+        explorer.get_address_transactions_async(address, limit=20, fresh=fresh)
+    )
     if transactions:
-        fig, node_addresses = explorer.create_enhanced_transaction_graph(
-            address, transactions, time_filter
-        )
-        graph_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        graph_json, node_addresses = explorer.build_graph(address, transactions, time_filter, fresh)
         
-        return jsonify({
+        return with_cache_validators(json_response({
             'success': True,
             'graph': graph_json,
             'transactions': transactions,
             'node_addresses': node_addresses
-        })
+        }))
     else:
-        return jsonify({'success': False, 'error': 'Failed to fetch transactions'})
+        return json_response({'success': False, 'error': 'Failed to fetch transactions'}, 502)
+
+@app.route('/api/explore_batch', methods=['POST'])
+async def explore_batch():
+    """Fetch transactions for several addresses in one call"""
+    payload = request.get_json(silent=True)
+    addresses = payload.get('addresses') if isinstance(payload, dict) else None
+    if not isinstance(addresses, list) or not all(
+            isinstance(a, str) and ADDRESS_PATTERN.fullmatch(a) for a in addresses):
+        return json_response({'success': False, 'error': 'Expected {"addresses": [...]}'}, 400)
+    
+    addresses = list(dict.fromkeys(addresses))
+    if len(addresses) > MAX_BATCH_ADDRESSES:
+        return json_response({'success': False,
+                              'error': f'At most {MAX_BATCH_ADDRESSES} addresses per batch'}, 400)
+    
+    # Cap in-flight lookups to stay within Esplora's rate limits
+    semaphore = asyncio.Semaphore(8)
+    
+    async def fetch(address):
+        async with semaphore:
+            return await explorer.get_address_transactions_async(address, limit=15)
+    
+    results = await asyncio.gather(*(fetch(a) for a in addresses))
+    
+    return json_response({
+        'success': True,
+        'results': dict(zip(addresses, results))
+    })
 
 @app.route('/api/address_info/<address>')
 def get_address_info(address):
     """Get detailed address information"""
     info = explorer.get_address_info(address)
     if info:
-        return jsonify({'success': True, 'info': info})
+        return json_response({'success': True, 'info': info})
     else:
-        return jsonify({'success': False, 'error': 'Failed to fetch address info'})
+        return json_response({'success': False, 'error': 'Failed to fetch address info'})
 
 if __name__ == '__main__':
+    # The single-process debug server undoes the concurrency above; it is opt-in for development
+    if not os.environ.get('FLASK_DEV'):
+        raise SystemExit('Serve with `gunicorn app:app`, or set FLASK_DEV=1 for the debug server')
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,12 @@
+# File: gunicorn.conf.py
+# Production server settings, picked up automatically by `gunicorn app:app`
+import multiprocessing
+import os
+
+bind = '0.0.0.0:5000'
+
+# gevent workers monkey-patch sockets before loading the app, so the pooled
+# requests session yields while it waits on Esplora instead of blocking the worker
+worker_class = 'gevent'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_connections = 1000